@@ -1,25 +1,52 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+import asyncio
 import json
 import os
+import orjson
+from cachetools import TTLCache
 
-app = FastAPI(title="CS50 Python Platform API")
+app = FastAPI(title="CS50 Python Platform API", default_response_class=ORJSONResponse)
 
-# Enable CORS for frontend
+# Enable CORS for frontend (ASGI-only middleware; see the policy note in main.py)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    max_age=600,
 )
 
-# Simple in-memory storage (replace with database later)
-users_db = {}
-progress_db = {}
+# Simple in-memory storage (replace with database later). Bounded, and
+# entries expire after a day so an idle process does not grow forever.
+users_db = TTLCache(maxsize=10_000, ttl=86_400)
+progress_db = TTLCache(maxsize=100_000, ttl=86_400)
+# user_id -> progress_db keys in first-saved order (a dict used as an ordered
+# set), bounded like progress_db itself. Rewritten on every save so it
+# outlives that user's entries; may hold keys that have since expired.
+user_index: "TTLCache[str, Dict[str, None]]" = TTLCache(maxsize=100_000, ttl=86_400)
+_store_lock = asyncio.Lock()
+
+def user_progress_entries(user_id: str) -> Dict[str, dict]:
+    keys = user_index.get(user_id)
+    if not keys:
+        return {}
+    entries = {}
+    for k in keys:
+        entry = progress_db.get(k)
+        if entry is not None:
+            entries[k] = entry
+    if len(entries) != len(keys):
+        if entries:
+            user_index[user_id] = dict.fromkeys(entries)
+        else:
+            del user_index[user_id]
+    return entries
 
 # ============ Models ============
 class User(BaseModel):
@@ -37,22 +64,6 @@ class Progress(BaseModel):
     completed: bool
     timestamp: datetime
 
-class Lesson(BaseModel):
-    id: str
-    title: str
-    description: str
-    video_url: str
-    duration: str
-    order: int
-
-class Challenge(BaseModel):
-    id: str
-    lesson_id: str
-    title: str
-    description: str
-    starter_code: str
-    test_cases: List[dict]
-
 # ============ Data ============
 LESSONS = [
     {
@@ -123,57 +134,71 @@ CHALLENGES = [
     }
 ]
 
+# The catalogue never changes at runtime, so index and serialize it once
+_LESSONS_BY_ID = {l["id"]: l for l in LESSONS}
+_CHALLENGES_BY_ID = {c["id"]: c for c in CHALLENGES}
+_CHALLENGES_BY_LESSON: Dict[str, List[dict]] = {}
+for c in CHALLENGES:
+    _CHALLENGES_BY_LESSON.setdefault(c["lesson_id"], []).append(c)
+
+LESSONS_JSON = orjson.dumps(LESSONS)
+CHALLENGES_JSON = orjson.dumps(CHALLENGES)
+CHALLENGES_JSON_BY_LESSON = {lid: orjson.dumps(cs) for lid, cs in _CHALLENGES_BY_LESSON.items()}
+
 # ============ Routes ============
 
 @app.get("/")
 def read_root():
     return {"message": "CS50 Python Platform API", "status": "running"}
 
-@app.get("/api/lessons", response_model=List[Lesson])
+@app.get("/api/lessons")
 def get_lessons():
     """Get all lessons"""
-    return LESSONS
+    return Response(LESSONS_JSON, media_type="application/json")
 
-@app.get("/api/lessons/{lesson_id}", response_model=Lesson)
+@app.get("/api/lessons/{lesson_id}")
 def get_lesson(lesson_id: str):
     """Get specific lesson"""
-    lesson = next((l for l in LESSONS if l["id"] == lesson_id), None)
+    lesson = _LESSONS_BY_ID.get(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return lesson
 
-@app.get("/api/challenges", response_model=List[Challenge])
+@app.get("/api/challenges")
 def get_challenges(lesson_id: Optional[str] = None):
     """Get all challenges or filter by lesson"""
     if lesson_id:
-        return [c for c in CHALLENGES if c["lesson_id"] == lesson_id]
-    return CHALLENGES
+        body = CHALLENGES_JSON_BY_LESSON.get(lesson_id, b"[]")
+    else:
+        body = CHALLENGES_JSON
+    return Response(body, media_type="application/json")
 
-@app.get("/api/challenges/{challenge_id}", response_model=Challenge)
+@app.get("/api/challenges/{challenge_id}")
 def get_challenge(challenge_id: str):
     """Get specific challenge"""
-    challenge = next((c for c in CHALLENGES if c["id"] == challenge_id), None)
+    challenge = _CHALLENGES_BY_ID.get(challenge_id)
     if not challenge:
         raise HTTPException(status_code=404, detail="Challenge not found")
     return challenge
 
 @app.post("/api/register")
-def register(user: User):
+async def register(user: User):
     """Register new user"""
-    if user.username in users_db:
-        raise HTTPException(status_code=400, detail="Username already exists")
-    
-    users_db[user.username] = {
-        "username": user.username,
-        "email": user.email,
-        "password": user.password,  # In production, hash this!
-        "created_at": datetime.now().isoformat()
-    }
+    async with _store_lock:
+        if user.username in users_db:
+            raise HTTPException(status_code=400, detail="Username already exists")
+        
+        users_db[user.username] = {
+            "username": user.username,
+            "email": user.email,
+            "password": user.password,  # In production, hash this!
+            "created_at": datetime.now().isoformat()
+        }
     
     return {"message": "User registered successfully", "username": user.username}
 
 @app.post("/api/login")
-def login(credentials: UserLogin):
+async def login(credentials: UserLogin):
     """Login user"""
     user = users_db.get(credentials.username)
     if not user or user["password"] != credentials.password:
@@ -188,27 +213,31 @@ def login(credentials: UserLogin):
     }
 
 @app.post("/api/progress")
-def save_progress(progress: Progress):
+async def save_progress(progress: Progress):
     """Save user progress"""
     key = f"{progress.user_id}_{progress.lesson_id}"
-    progress_db[key] = {
+    entry = {
         "user_id": progress.user_id,
         "lesson_id": progress.lesson_id,
         "completed": progress.completed,
         "timestamp": progress.timestamp.isoformat()
     }
-    return {"message": "Progress saved", "progress": progress_db[key]}
+    async with _store_lock:
+        progress_db[key] = entry
+        keys = {k: None for k in user_index.get(progress.user_id, ()) if k in progress_db}
+        keys[key] = None
+        user_index[progress.user_id] = keys
+    return {"message": "Progress saved", "progress": entry}
 
 @app.get("/api/progress/{user_id}")
-def get_progress(user_id: str):
+async def get_progress(user_id: str):
     """Get user progress"""
-    user_progress = {k: v for k, v in progress_db.items() if v["user_id"] == user_id}
-    return {"progress": user_progress}
+    return {"progress": user_progress_entries(user_id)}
 
 @app.get("/api/stats/{user_id}")
-def get_stats(user_id: str):
+async def get_stats(user_id: str):
     """Get user statistics"""
-    user_progress = [v for k, v in progress_db.items() if v["user_id"] == user_id]
+    user_progress = user_progress_entries(user_id).values()
     completed_lessons = sum(1 for p in user_progress if p["completed"])
     
     return {
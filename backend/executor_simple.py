@@ -1,13 +1,24 @@
 import os
+import asyncio
+import hashlib
+import hmac
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from fastapi import FastAPI, HTTPException, Depends
+from sqlalchemy import Index, exists, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
 from datetime import datetime
 from passlib.context import CryptContext
+from cachetools import TLRUCache, TTLCache
 import jwt
 
 load_dotenv()
@@ -15,31 +26,82 @@ load_dotenv()
 # Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
+SECRET_KEY_BYTES = SECRET_KEY.encode()
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# Password hashing
+# The async engine needs the asyncpg driver; accept plain postgresql:// URLs too
+if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# JWT codec configured once; every token must carry sub and exp
+_jwt = jwt.PyJWT(options={"verify_signature": True, "verify_exp": True, "require": ["sub", "exp"]})
+
+# Password hashing. bcrypt is CPU-bound, so it runs in worker processes
+# instead of on the event loop or the shared threadpool.
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Import models
 from models import Base, User, Lesson, Challenge, UserProgress, UserSubmission
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Indexes the queries below rely on. They are created explicitly at startup
+# because create_all() skips indexes on tables that already exist.
+progress_indexes = [
+    # Conflict target for the progress upsert in submit_challenge
+    Index(
+        "uq_user_progress_user_challenge",
+        UserProgress.user_id,
+        UserProgress.challenge_id,
+        unique=True,
+    ),
+    # Completed-challenge count in get_user_stats
+    Index(
+        "idx_progress_user_completed",
+        UserProgress.user_id,
+        postgresql_where=UserProgress.completed.is_(True),
+    ),
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for index in progress_indexes:
+            await conn.run_sync(index.create, checkfirst=True)
+    yield
+    await engine.dispose()
+    BCRYPT_POOL.shutdown()
 
 # FastAPI app
-app = FastAPI(title="CS50 Python Platform API")
+app = FastAPI(
+    title="CS50 Python Platform API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
-# CORS
+# CORS (ASGI-only middleware; see the policy note in main.py)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    max_age=600,
 )
 
 # ==================== Pydantic Models ====================
@@ -103,38 +165,75 @@ class SubmissionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# List endpoints validate and serialize rows in one pydantic-core call each
+LESSON_LIST_ADAPTER = TypeAdapter(List[LessonResponse])
+CHALLENGE_LIST_ADAPTER = TypeAdapter(List[ChallengeResponse])
+
 # ==================== Database Dependency ====================
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # ==================== Helper Functions ====================
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _check_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# Recently verified passwords, so repeated logins skip the bcrypt rounds.
+# Keys are HMACs bound to the stored hash (a password change invalidates
+# them) and failed checks are never cached.
+_verified_passwords = TTLCache(maxsize=5000, ttl=60)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    cache_key = hmac.new(
+        SECRET_KEY_BYTES,
+        hashed_password.encode() + b"\0" + plain_password.encode(),
+        hashlib.sha256,
+    ).digest()
+    if cache_key in _verified_passwords:
+        return True
+
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(BCRYPT_POOL, _check_password, plain_password, hashed_password):
+        return False
+
+    _verified_passwords[cache_key] = True
+    return True
+
 def create_access_token(user_id: int) -> str:
-    payload = {"sub": str(user_id)}
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    payload = {
+        "sub": str(user_id),
+        "exp": int(time.time()) + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+    return _jwt.encode(payload, SECRET_KEY_BYTES, algorithm=ALGORITHM)
+
+# Verified tokens -> (user, exp), evicted once the token itself expires.
+# Only touched from the event loop, so no locking is needed.
+_token_cache = TLRUCache(maxsize=10000, ttu=lambda _key, entry, _now: entry[1], timer=time.time)
+
+async def get_current_user(token: str, db: AsyncSession = Depends(get_db)):
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return cached[0]
 
-def get_current_user(token: str, db: Session = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _jwt.decode(token, SECRET_KEY_BYTES, algorithms=[ALGORITHM])
         user_id = int(payload.get("sub"))
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return user
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    _token_cache[cache_key] = (user, payload["exp"])
+    return user
+
 # ==================== Routes ====================
 
 @app.get("/")
@@ -144,24 +243,33 @@ def read_root():
 # ==================== Authentication Routes ====================
 
 @app.post("/api/register")
-def register(user: UserRegister, db: Session = Depends(get_db)):
-    # Check if user exists
-    existing_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
+async def register(user: UserRegister, db: AsyncSession = Depends(get_db)):
+    # Check if user exists: one short-circuiting index probe per unique column
+    # rather than a single OR-ed scan over both
+    user_exists = await db.scalar(select(or_(
+        exists().where(User.username == user.username),
+        exists().where(User.email == user.email)
+    )))
     
-    if existing_user:
+    if user_exists:
         raise HTTPException(status_code=400, detail="Username or email already exists")
     
     # Create new user
     new_user = User(
         username=user.username,
         email=user.email,
-        password_hash=hash_password(user.password)
+        password_hash=await asyncio.get_running_loop().run_in_executor(
+            BCRYPT_POOL, hash_password, user.password
+        )
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration for the same name/email
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username or email already exists")
+    await db.refresh(new_user)
     
     return {
         "message": "User registered successfully",
@@ -170,11 +278,12 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
     }
 
 @app.post("/api/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     # Find user
-    user = db.query(User).filter(User.username == credentials.username).first()
+    result = await db.execute(select(User).where(User.username == credentials.username))
+    user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password(credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create token
@@ -193,14 +302,36 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 # ==================== Lessons Routes ====================
 
+# Lesson and challenge content changes on the order of days: keep the
+# serialized lists for a minute and let clients revalidate with If-None-Match.
+CATALOG_MAX_AGE = 60
+_lessons_cache = TTLCache(maxsize=1, ttl=CATALOG_MAX_AGE)  # key -> (etag, body)
+_challenges_cache = TTLCache(maxsize=256, ttl=CATALOG_MAX_AGE)  # lesson_id -> (etag, body)
+
+def json_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def cached_json_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @app.get("/api/lessons", response_model=List[LessonResponse])
-def get_lessons(db: Session = Depends(get_db)):
-    lessons = db.query(Lesson).order_by(Lesson.order).all()
-    return lessons
+async def get_lessons(request: Request, db: AsyncSession = Depends(get_db)):
+    cached = _lessons_cache.get("all")
+    if cached is None:
+        result = await db.execute(select(Lesson).order_by(Lesson.order))
+        lessons = LESSON_LIST_ADAPTER.validate_python(result.scalars().all(), from_attributes=True)
+        body = LESSON_LIST_ADAPTER.dump_json(lessons)
+        cached = _lessons_cache["all"] = (json_etag(body), body)
+    return cached_json_response(request, *cached)
 
 @app.get("/api/lessons/{lesson_id}", response_model=LessonResponse)
-def get_lesson(lesson_id: int, db: Session = Depends(get_db)):
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+async def get_lesson(lesson_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Lesson).where(Lesson.id == lesson_id))
+    lesson = result.scalar_one_or_none()
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return lesson
@@ -208,15 +339,22 @@ def get_lesson(lesson_id: int, db: Session = Depends(get_db)):
 # ==================== Challenges Routes ====================
 
 @app.get("/api/challenges", response_model=List[ChallengeResponse])
-def get_challenges(lesson_id: Optional[int] = None, db: Session = Depends(get_db)):
-    query = db.query(Challenge)
-    if lesson_id:
-        query = query.filter(Challenge.lesson_id == lesson_id)
-    return query.all()
+async def get_challenges(request: Request, lesson_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    cached = _challenges_cache.get(lesson_id)
+    if cached is None:
+        query = select(Challenge)
+        if lesson_id:
+            query = query.where(Challenge.lesson_id == lesson_id)
+        result = await db.execute(query)
+        challenges = CHALLENGE_LIST_ADAPTER.validate_python(result.scalars().all(), from_attributes=True)
+        body = CHALLENGE_LIST_ADAPTER.dump_json(challenges)
+        cached = _challenges_cache[lesson_id] = (json_etag(body), body)
+    return cached_json_response(request, *cached)
 
 @app.get("/api/challenges/{challenge_id}", response_model=ChallengeResponse)
-def get_challenge(challenge_id: int, db: Session = Depends(get_db)):
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+async def get_challenge(challenge_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Challenge).where(Challenge.id == challenge_id))
+    challenge = result.scalar_one_or_none()
     if not challenge:
         raise HTTPException(status_code=404, detail="Challenge not found")
     return challenge
@@ -224,48 +362,54 @@ def get_challenge(challenge_id: int, db: Session = Depends(get_db)):
 # ==================== Progress Routes ====================
 
 @app.get("/api/user/progress")
-def get_user_progress(token: str = None, db: Session = Depends(get_db)):
+async def get_user_progress(token: str = None, db: AsyncSession = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=401, detail="No token provided")
     
-    user = get_current_user(token, db)
-    progress = db.query(UserProgress).filter(UserProgress.user_id == user.id).all()
+    user = await get_current_user(token, db)
+    # Only the reported columns are selected, so no ORM instances are built
+    # and no relationship can be lazy-loaded per row.
+    result = await db.execute(
+        select(
+            UserProgress.challenge_id,
+            UserProgress.completed,
+            UserProgress.best_score,
+            UserProgress.attempts,
+        ).where(UserProgress.user_id == user.id)
+    )
     
     return {
         "user_id": user.id,
-        "progress": [
-            {
-                "challenge_id": p.challenge_id,
-                "completed": p.completed,
-                "best_score": p.best_score,
-                "attempts": p.attempts
-            }
-            for p in progress
-        ]
+        "progress": [dict(row) for row in result.mappings()]
     }
 
 @app.get("/api/user/stats")
-def get_user_stats(token: str = None, db: Session = Depends(get_db)):
+async def get_user_stats(token: str = None, db: AsyncSession = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=401, detail="No token provided")
     
-    user = get_current_user(token, db)
+    user = await get_current_user(token, db)
     
-    total_lessons = db.query(Lesson).count()
-    completed_challenges = db.query(UserProgress).filter(
-        (UserProgress.user_id == user.id) & (UserProgress.completed == True)
-    ).count()
-    total_challenges = db.query(Challenge).count()
-    average_score = db.query(UserSubmission).filter(
-        UserSubmission.user_id == user.id
-    ).value(db.func.avg(UserSubmission.score)) or 0
+    # All four aggregates in a single round trip
+    stmt = select(
+        select(func.count(Lesson.id)).scalar_subquery().label("total_lessons"),
+        select(func.count(Challenge.id)).scalar_subquery().label("total_challenges"),
+        select(func.count()).select_from(UserProgress).where(
+            UserProgress.user_id == user.id, UserProgress.completed.is_(True)
+        ).scalar_subquery().label("completed_challenges"),
+        select(func.coalesce(func.avg(UserSubmission.score), 0)).where(
+            UserSubmission.user_id == user.id
+        ).scalar_subquery().label("average_score"),
+    )
+    result = await db.execute(stmt)
+    total_lessons, total_challenges, completed_challenges, average_score = result.one()
     
     return {
         "total_lessons": total_lessons,
         "total_challenges": total_challenges,
         "completed_challenges": completed_challenges,
         "completion_rate": round((completed_challenges / total_challenges * 100), 1) if total_challenges > 0 else 0,
-        "average_score": round(average_score, 1)
+        "average_score": round(float(average_score), 1)
     }
 
 # ==================== Code Execution Routes ====================
@@ -284,56 +428,69 @@ def execute_code(code: str = None):
 # ==================== Submission Routes ====================
 
 @app.post("/api/challenges/{challenge_id}/submit", response_model=SubmissionResponse)
-def submit_challenge(
+async def submit_challenge(
     challenge_id: int,
     submission: SubmissionRequest,
     token: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     if not token:
         raise HTTPException(status_code=401, detail="No token provided")
     
-    user = get_current_user(token, db)
-    challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
+    user = await get_current_user(token, db)
+    result = await db.execute(select(Challenge).where(Challenge.id == challenge_id))
+    challenge = result.scalar_one_or_none()
     
     if not challenge:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
     # Execute code and run test cases
-    test_result = run_test_cases(submission.code, challenge.test_cases or [])
+    test_result = await run_in_threadpool(run_test_cases, submission.code, challenge.test_cases or [])
+    
+    result = await db.execute(
+        insert(UserSubmission).values(
+            user_id=user.id,
+            challenge_id=challenge_id,
+            code=submission.code,
+            passed_tests=test_result["passed"],
+            total_tests=test_result["total"],
+            score=test_result["score"],
+            output=""
+        ).returning(UserSubmission.id, UserSubmission.submitted_at)
+    )
+    submission_id, submitted_at = result.one()
+    
+    # Update user progress in one statement, creating the row on first attempt.
+    # Completion is sticky: a later failing run doesn't clear it.
+    upsert = pg_insert(UserProgress).values(
+        user_id=user.id,
+        challenge_id=challenge_id,
+        attempts=1,
+        last_submitted=datetime.utcnow(),
+        best_score=test_result["score"],
+        completed=test_result["passed"] == test_result["total"]
+    )
+    await db.execute(upsert.on_conflict_do_update(
+        index_elements=[UserProgress.user_id, UserProgress.challenge_id],
+        set_={
+            "attempts": UserProgress.attempts + 1,
+            "last_submitted": upsert.excluded.last_submitted,
+            "best_score": func.greatest(UserProgress.best_score, upsert.excluded.best_score),
+            "completed": or_(UserProgress.completed, upsert.excluded.completed),
+        }
+    ))
+    
+    await db.commit()
     
-    new_submission = UserSubmission(
+    return SubmissionResponse(
+        id=submission_id,
         user_id=user.id,
         challenge_id=challenge_id,
-        code=submission.code,
         passed_tests=test_result["passed"],
         total_tests=test_result["total"],
         score=test_result["score"],
-        output=""
+        submitted_at=submitted_at
     )
-    db.add(new_submission)
-    
-    # Update user progress
-    progress = db.query(UserProgress).filter(
-        (UserProgress.user_id == user.id) & (UserProgress.challenge_id == challenge_id)
-    ).first()
-    
-    if not progress:
-        progress = UserProgress(user_id=user.id, challenge_id=challenge_id)
-        db.add(progress)
-    
-    progress.attempts += 1
-    progress.last_submitted = datetime.utcnow()
-    progress.best_score = max(progress.best_score, test_result["score"])
-    
-    # Mark as completed if all tests pass
-    if test_result["passed"] == test_result["total"]:
-        progress.completed = True
-    
-    db.commit()
-    db.refresh(new_submission)
-    
-    return new_submission
 
 # ==================== Run ====================
 